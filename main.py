@@ -1,10 +1,12 @@
 # Example from neopixel.py folder with modifications
 import time
+from micropython import const
 from neopixel import Neopixel
 
-numpix = 53 * 4 # Number of LEDs in strip x4 
-pin = 28
-strip = Neopixel(numpix, 0, pin, "GRB")
+_NUMPIX = const(53 * 4) # Number of LEDs in strip x4 
+_PIN = const(28)
+_SHOW_EVERY = const(8) # Push the strip out every N pixels instead of after every pixel
+strip = Neopixel(_NUMPIX, 0, _PIN, "GRB")
 strip.brightness(100)
 
 red = (255,0,0)
@@ -25,50 +27,66 @@ pink3 = (255,0,128)
 pink4 = (255,0,64)
 
 colors = (red, orange1, orange2, yellow, green1, green2, blue1, blue2, blue3, pink1, pink2, pink3, pink4)
+packed_colors = tuple(strip.pack(c) for c in colors) # Brightness is fixed, so pack the palette once
+
+# Busy wait until a time.ticks_ms() deadline, used instead of sleep so frames keep a steady pace
+# while the state machine is still sending the previous one
+def wait_until(deadline):
+    while time.ticks_diff(deadline, time.ticks_ms()) > 0:
+        pass
+
+# Fill pixels start to end-1 with one color, one pixel every pixel_ms, pushing every _SHOW_EVERY pixels
+def wipe(px, start, end, pixel_ms):
+    frame_ms = pixel_ms * _SHOW_EVERY
+    deadline = time.ticks_add(time.ticks_ms(), frame_ms)
+    for i in range(start, end):
+        strip.set_pixel_raw(i, px)
+        if (i - start) % _SHOW_EVERY == _SHOW_EVERY - 1:
+            strip.show_async()
+            wait_until(deadline)
+            deadline = time.ticks_add(deadline, frame_ms)
+    strip.show()
 
 def rainbow_static():
-    for multiplier in range(numpix//len(colors)):
-        print(multiplier)
-        for i, color in enumerate(colors):
-            strip.set_pixel(i, color)
-            time.sleep(0.3)
-            strip.show()
+    # Repeat the palette along the strip, with a partial copy at the end so every pixel is set,
+    # and set the whole frame in one call
+    frame = colors * (_NUMPIX // len(colors)) + colors[:_NUMPIX % len(colors)]
+    strip.set_pixels(frame)
+    strip.show()
 
 def rainbow_run(count):
     n = 1
     while n <= count:
-        for color in colors:
-            for i in range(numpix):
-                strip.set_pixel(i, color)
-                time.sleep(0.3)
-                strip.show()
+        for px in packed_colors:
+            wipe(px, 0, _NUMPIX, 300)
      #   print("Loop number: ", n)
         n += 1
         
     strip.fill((0,0,0))
     strip.show()
         
+# Rainbow gradient running along the strip, rendered once and then only copied each frame
+def rainbow_gradient(count, frame_ms=50):
+    lut = strip.build_gradient_lut(colors, reverse=False, rainbow=True)
+    deadline = time.ticks_add(time.ticks_ms(), frame_ms)
+    for n in range(count):
+        strip.set_pixels_from_lut(lut, n)
+        strip.show_async()
+        wait_until(deadline)
+        deadline = time.ticks_add(deadline, frame_ms)
+    strip.show()
+
 def rainbow_off():
     strip.fill((0,0,0))
     strip.show()
 #    time.sleep(0.5)
 
 def segment(start, end):
-    for color in colors:
+    for px in packed_colors:
         time.sleep(0.5)
-        for i in range(start, end):
-            strip.set_pixel(i, color)
-            time.sleep(0.03)
-            strip.show()
+        wipe(px, start, end, 30)
 
 while True:
-    for color in colors:
+    for px in packed_colors:
         time.sleep(0.5)
-        for i in range(numpix):
-            strip.set_pixel(i, color)
-            time.sleep(0.03)
-            strip.show()
-        
-
-
-
+        wipe(px, 0, _NUMPIX, 30)
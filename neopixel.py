@@ -7,11 +7,26 @@ A library for using ws2812b and sk6812 leds (aka neopixels) with Raspberry Pi Pi
 """
 import array, time
 from machine import Pin
+import micropython
+from micropython import const
 import rp2
 
+# TX FIFO of state machine 0 on each PIO block, the other state machines follow 4 bytes apart
+_PIO0_TXF0 = const(0x50200010)
+_PIO1_TXF0 = const(0x50300010)
+
+# Layout of the params bytes after the 256 byte brightness LUT (see _pack_and_store)
+_P_R = const(256)
+_P_G = const(257)
+_P_B = const(258)
+_P_W = const(259)
+_P_HAS_W = const(260)
+_P_BPP = const(261)
+
 try:        # AttributeError under sphinx when machine package not available
-    # PIO state machine for RGB. Pulls 24 bits (rgb -> 3 * 8bit) automatically
-    @rp2.asm_pio(sideset_init=rp2.PIO.OUT_LOW, out_shiftdir=rp2.PIO.SHIFT_LEFT, autopull=True, pull_thresh=24)
+    # PIO state machine for the strip. Pixels are sent a byte at a time in wire order, so it pulls
+    # 8 bits (one color) automatically and works for both RGB and RGBW strips
+    @rp2.asm_pio(sideset_init=rp2.PIO.OUT_LOW, out_shiftdir=rp2.PIO.SHIFT_LEFT, autopull=True, pull_thresh=8)
     def ws2812():
         T1 = 2
         T2 = 5
@@ -28,38 +43,129 @@ except AttributeError:
     def ws2812():
         pass
 
-try:        # AttributeError under sphinx when machine package not available
-    # PIO state machine for RGBW. Pulls 32 bits (rgbw -> 4 * 8bit) automatically
-    @rp2.asm_pio(sideset_init=rp2.PIO.OUT_LOW, out_shiftdir=rp2.PIO.SHIFT_LEFT, autopull=True, pull_thresh=32)
-    def sk6812():
-        T1 = 2
-        T2 = 5
-        T3 = 3
-        wrap_target()
-        label("bitloop")
-        out(x, 1)               .side(0)    [T3 - 1]
-        jmp(not_x, "do_zero")   .side(1)    [T1 - 1]
-        jmp("bitloop")          .side(1)    [T2 - 1]
-        label("do_zero")
-        nop()                   .side(0)    [T2 - 1]
-        wrap()
-except AttributeError:
-    def sk6812():
-        pass
+# RGBW strips have the same timing, they just take 4 bytes per pixel
+sk6812 = ws2812
+
+
+# Viper helpers for the per-pixel hot paths. Pixels are stored as bytes in wire order, bpp bytes each.
+# Channel values are masked to a byte before the LUT lookup, here and in the Python methods alike.
+# Viper functions take at most 4 arguments, so brightness and layout are passed in the params bytes:
+# 256 byte brightness LUT, then byte index of R, G, B, W within a pixel, has W and bytes per pixel
+@micropython.viper
+def _pack_and_store(buf: ptr8, idx: int, rgb_w, params: ptr8):
+    pos = idx * params[_P_BPP]
+    buf[pos + params[_P_R]] = params[int(rgb_w[0]) & 0xff]
+    buf[pos + params[_P_G]] = params[int(rgb_w[1]) & 0xff]
+    buf[pos + params[_P_B]] = params[int(rgb_w[2]) & 0xff]
+    if params[_P_HAS_W]:
+        # if it's (r, g, b, w)
+        if int(len(rgb_w)) == 4:
+            buf[pos + params[_P_W]] = params[int(rgb_w[3]) & 0xff]
+        else:
+            buf[pos + params[_P_W]] = 0
+
+# Same as _pack_and_store for every color in seq, from pixel start on
+@micropython.viper
+def _store_colors(pixels, start: int, seq, params: ptr8):
+    buf = ptr8(pixels)
+    size = int(len(pixels))
+    bpp = params[_P_BPP]
+    pos = start * bpp
+    for rgb_w in seq:
+        if pos + bpp > size:
+            raise IndexError("pixel index out of range")
+        buf[pos + params[_P_R]] = params[int(rgb_w[0]) & 0xff]
+        buf[pos + params[_P_G]] = params[int(rgb_w[1]) & 0xff]
+        buf[pos + params[_P_B]] = params[int(rgb_w[2]) & 0xff]
+        if params[_P_HAS_W]:
+            # if it's (r, g, b, w)
+            if int(len(rgb_w)) == 4:
+                buf[pos + params[_P_W]] = params[int(rgb_w[3]) & 0xff]
+            else:
+                buf[pos + params[_P_W]] = 0
+        pos += bpp
+
+# Copy the packed pixel px into n pixels from pixel start on
+@micropython.viper
+def _fill_pixel(buf: ptr8, start: int, n: int, px):
+    bpp = int(len(px))
+    src = ptr8(px)
+    i = start * bpp
+    end = i + n * bpp
+    while i < end:
+        j = 0
+        while j < bpp:
+            buf[i + j] = src[j]
+            j += 1
+        i += bpp
+
+# Shift every pixel one place to the right (or left) in place, wrapping the end around.
+# The wrapped pixel (at most 4 bytes) is held in an int while the rest of the buffer moves
+@micropython.viper
+def _rotate_right_one(buf: ptr8, size: int, bpp: int):
+    last = 0
+    j = size - bpp
+    while j < size:
+        last = (last << 8) | buf[j]
+        j += 1
+    i = size - 1
+    while i >= bpp:
+        buf[i] = buf[i - bpp]
+        i -= 1
+    j = bpp - 1
+    while j >= 0:
+        buf[j] = last & 0xff
+        last = last >> 8
+        j -= 1
+
+@micropython.viper
+def _rotate_left_one(buf: ptr8, size: int, bpp: int):
+    first = 0
+    j = 0
+    while j < bpp:
+        first = (first << 8) | buf[j]
+        j += 1
+    i = 0
+    while i < size - bpp:
+        buf[i] = buf[i + bpp]
+        i += 1
+    j = size - 1
+    while j >= size - bpp:
+        buf[j] = first & 0xff
+        first = first >> 8
+        j -= 1
+
+# grad is [r, g, b, w starts, r, g, b, w increments] in 16.16 fixed point, with brightness already
+# applied, followed by [byte index of R, G, B, W, has W, bytes per pixel]
+@micropython.viper
+def _gradient_line(buf: ptr8, start: int, n: int, grad: ptr32):
+    red = grad[0]
+    green = grad[1]
+    blue = grad[2]
+    white = grad[3]
+    bpp = grad[13]
+    pos = start * bpp
+    end = pos + n * bpp
+    while pos < end:
+        buf[pos + grad[8]] = red >> 16
+        buf[pos + grad[9]] = green >> 16
+        buf[pos + grad[10]] = blue >> 16
+        if grad[12]:
+            buf[pos + grad[11]] = white >> 16
+        red += grad[4]
+        green += grad[5]
+        blue += grad[6]
+        white += grad[7]
+        pos += bpp
 
 
 # Delay here is the reset time. You need a pause to reset the LED strip back to the initial LED
 # however, if you have quite a bit of processing to do before the next time you update the strip
 # you could put in delay=0 (or a lower delay)
 #
-# Class supports different order of individual colors (GRB, RGB, WRGB, GWRB ...). In order to achieve
-# this, we need to flip the indexes: in 'RGBW', 'R' is on index 0, but we need to shift it left by 3 * 8bits,
-# so in it's inverse, 'WBGR', it has exactly right index. Since micropython doesn't have [::-1] and recursive rev()
-# isn't too efficient we simply do that by XORing (operator ^) each index with 3 (0b11) to make this flip.
-# When dealing with just 'RGB' (3 letter string), this means same but reduced by 1 after XOR!.
-# Example: in 'GRBW' we want final form of 0bGGRRBBWW, meaning G with index 0 needs to be shifted 3 * 8bit ->
-# 'G' on index 0: 0b00 ^ 0b11 -> 0b11 (3), just as we wanted.
-# Same hold for every other index (and - 1 at the end for 3 letter strings).
+# Class supports different order of individual colors (GRB, RGB, WRGB, GWRB ...). Pixels are kept as
+# bytes in the order they are sent to the strip, so the position of a letter in the mode string is the
+# byte it goes into. Example: in 'GRBW' pixel n is 4 bytes at n * 4, and 'R' is the byte at n * 4 + 1.
 
 class Neopixel:
     """Neopixel
@@ -71,22 +177,76 @@ class Neopixel:
     :param delay: Delay time. Default 0.0001
     """
     def __init__(self, num_leds, state_machine, pin, mode="RGB", delay=0.0001):
-        self.pixels = array.array("I", [0 for _ in range(num_leds)])
         self.mode = set(mode)   # set for better performance
-        if 'W' in self.mode:
-            # RGBW uses different PIO state machine configuration
+        self._has_w = 'W' in self.mode
+        # bytes per pixel, 3 for RGB and 4 for RGBW
+        self._bpp = len(mode)
+        # Two buffers: pixels is drawn into while _front is being clocked out by the state machine
+        self._pix_a = bytearray(self._bpp * num_leds)
+        self._pix_b = bytearray(self._bpp * num_leds)
+        self.pixels = self._pix_a
+        self._front = self._pix_b
+        if self._has_w:
             self.sm = rp2.StateMachine(state_machine, sk6812, freq=8000000, sideset_base=Pin(pin))
-            # dictionary of values required to shift bit into position (check class desc.)
-            self.shift = {'R': (mode.index('R') ^ 3) * 8, 'G': (mode.index('G') ^ 3) * 8,
-                          'B': (mode.index('B') ^ 3) * 8, 'W': (mode.index('W') ^ 3) * 8}
         else:
             self.sm = rp2.StateMachine(state_machine, ws2812, freq=8000000, sideset_base=Pin(pin))
-            self.shift = {'R': ((mode.index('R') ^ 3) - 1) * 8, 'G': ((mode.index('G') ^ 3) - 1) * 8,
-                          'B': ((mode.index('B') ^ 3) - 1) * 8, 'W': 0}
+        # byte index of each color within a pixel (check class desc.)
+        self._iR = mode.index('R')
+        self._iG = mode.index('G')
+        self._iB = mode.index('B')
+        self._iW = mode.index('W') if self._has_w else 0
         self.sm.active(1)
+        self._dma = None
+        pio, sm = state_machine // 4, state_machine % 4
+        # Only the PIO0 and PIO1 FIFO addresses and DREQs are known here, other blocks use sm.put()
+        if pio == 0:
+            self._txf = _PIO0_TXF0 + 4 * sm
+        elif pio == 1:
+            self._txf = _PIO1_TXF0 + 4 * sm
+        else:
+            pio = None
+        if pio is not None:
+            try:
+                # Feed the state machine from a DMA channel so show() returns straight away.
+                # Byte writes to the TX FIFO land in every byte lane, the top one is shifted out first
+                self._dma = rp2.DMA()
+                self._dma_ctrl = self._dma.pack_ctrl(size=0, inc_read=True, inc_write=False, treq_sel=pio * 8 + sm)
+            # rp2.DMA needs MicroPython 1.20+ and raises OSError when no channel is free, fall back to sm.put()
+            except (AttributeError, OSError):
+                self._dma = None
         self.num_leds = num_leds
         self.delay = delay
+        # ticks_us() after which the last frame is fully on the wire and the reset gap has passed
+        self._latch_at = None
         self.brightnessvalue = 255
+        self._recompute_cache()
+
+    # Cache brightness dependent values used for every pixel, so they are not computed again in set_pixel
+    def _recompute_cache(self):
+        # Brightness as 8.8 fixed point, (x * _scale) >> 8 maps 255 to brightnessvalue without floats
+        self._scale = self.brightnessvalue + 1
+        # Brightness applied to every possible channel value, so scaling a channel is a single lookup
+        self._lut = bytes((i * self._scale) >> 8 for i in range(256))
+        self._params = self._lut + bytes((self._iR, self._iG, self._iB, self._iW, self._has_w, self._bpp))
+        # Gradient state reused by every line: 4 starts, 4 deltas, then pixel layout
+        self._grad = array.array("i", [0] * 8 + [self._iR, self._iG, self._iB, self._iW, self._has_w, self._bpp])
+
+    # The viper helpers write through raw pointers, so indices are checked here before calling them.
+    # Negative pixel numbers count from the end, like list indices
+    def _pixel_index(self, pixel_num):
+        if pixel_num < 0:
+            pixel_num += self.num_leds
+        if pixel_num < 0 or pixel_num >= self.num_leds:
+            raise IndexError("pixel index out of range")
+        return pixel_num
+
+    # Resolve both ends of a line the same way, they must end up as 0 <= pixel1 <= pixel2 < num_leds
+    def _line_ends(self, pixel1, pixel2):
+        pixel1 = self._pixel_index(pixel1)
+        pixel2 = self._pixel_index(pixel2)
+        if pixel1 > pixel2:
+            raise IndexError("pixel line ends out of order")
+        return pixel1, pixel2
 
     # Set the overall value to adjust brightness when updating leds
     def brightness(self, brightness=None):
@@ -103,6 +263,7 @@ class Neopixel:
         if brightness > 255:
             brightness = 255
         self.brightnessvalue = brightness
+        self._recompute_cache()
 
     # Create a gradient with two RGB colors between "pixel1" and "pixel2" (inclusive)
     # Function accepts two (r, g, b) / (r, g, b, w) tuples
@@ -115,24 +276,42 @@ class Neopixel:
         :param right_rgb_w:
         :return: None
         """
+        pixel1 = self._pixel_index(pixel1)
+        pixel2 = self._pixel_index(pixel2)
         if pixel2 - pixel1 == 0:
             return
-        right_pixel = max(pixel1, pixel2)
-        left_pixel = min(pixel1, pixel2)
-
-        for i in range(right_pixel - left_pixel + 1):
-            fraction = i / (right_pixel - left_pixel)
-            red = round((right_rgb_w[0] - left_rgb_w[0]) * fraction + left_rgb_w[0])
-            green = round((right_rgb_w[1] - left_rgb_w[1]) * fraction + left_rgb_w[1])
-            blue = round((right_rgb_w[2] - left_rgb_w[2]) * fraction + left_rgb_w[2])
-            # if it's (r, g, b, w)
-            if len(left_rgb_w) == 4 and 'W' in self.mode:
-                white = round((right_rgb_w[3] - left_rgb_w[3]) * fraction + left_rgb_w[3])
-                self.set_pixel(left_pixel + i, (red, green, blue, white))
-            else:
-                self.set_pixel(left_pixel + i, (red, green, blue))
+        left_pixel, right_pixel = self._line_ends(min(pixel1, pixel2), max(pixel1, pixel2))
+        self._line_gradient(left_pixel, right_pixel, left_rgb_w, right_rgb_w, right_pixel - left_pixel + 1)
+
+    # Interpolate from left_rgb_w at left_pixel to right_rgb_w at right_pixel, but only write the first
+    # <count> pixels of the line. Indices must already be checked
+    def _line_gradient(self, left_pixel, right_pixel, left_rgb_w, right_rgb_w, count):
+        steps = right_pixel - left_pixel
+        # Starts and per pixel deltas are worked out once, the line itself is integer stepping.
+        # Brightness is applied to both ends, so the line interpolates output bytes and writes them as is.
+        # 16.16 fixed point, offset by half a step so the accumulator rounds instead of truncating
+        lut = self._lut
+        grad = self._grad
+        left, right = lut[left_rgb_w[0] & 0xff], lut[right_rgb_w[0] & 0xff]
+        grad[0] = (left << 16) + 0x8000
+        grad[4] = ((right - left) << 16) // steps
+        left, right = lut[left_rgb_w[1] & 0xff], lut[right_rgb_w[1] & 0xff]
+        grad[1] = (left << 16) + 0x8000
+        grad[5] = ((right - left) << 16) // steps
+        left, right = lut[left_rgb_w[2] & 0xff], lut[right_rgb_w[2] & 0xff]
+        grad[2] = (left << 16) + 0x8000
+        grad[6] = ((right - left) << 16) // steps
+        # if it's (r, g, b, w)
+        if len(left_rgb_w) == 4 and self._has_w:
+            left, right = lut[left_rgb_w[3] & 0xff], lut[right_rgb_w[3] & 0xff]
+            grad[3] = (left << 16) + 0x8000
+            grad[7] = ((right - left) << 16) // steps
+        else:
+            grad[3] = 0
+            grad[7] = 0
+        _gradient_line(self.pixels, left_pixel, count, grad)
     
-    # TODO Make more universal (Not just 2 or 4 divisions but universal to all cases
+    # Split "pixel1" to "pixel2" into one segment per color, each fading into the next one
     def segment_gradient(self, color_list, pixel1=0, pixel2=15, reverse=True, rainbow=False):
         """Show gradients between colors
 
@@ -143,57 +322,80 @@ class Neopixel:
         :param rainbow: Determines if this is a rainbow gradient. Defualt = False for 2 color gradients
         :return: None 
         """
+        pixel1 = self._pixel_index(pixel1)
+        pixel2 = self._pixel_index(pixel2)
         if pixel2 - pixel1 == 0:
             return
+        # the gradient always runs from the lower pixel up, like set_pixel_line_gradient
+        pixel1, pixel2 = self._line_ends(min(pixel1, pixel2), max(pixel1, pixel2))
         divs = len(color_list)
-        step = ((pixel2+1)//divs)
-        start_pixel = pixel1
-        end_pixel = step
+        step = (pixel2 - pixel1 + 1) // divs
         if divs == 4:
-            rainbow=True
-            reverse=False
+            rainbow = True
+            reverse = False
+        if not rainbow:
+            # two color gradients run back from the second color
+            reverse = True
         for i, color in enumerate(color_list):
-            for j in range(end_pixel - start_pixel + 1):
-                start_pixel = i * step
-                first_rgb_w = color
-                end_pixel = start_pixel + step
-                if end_pixel >= pixel2:
-                    end_pixel = pixel2
-                    second_rgb_w = color_list[0]
-                else:
-                    second_rgb_w = color_list[i+1]
-#                 print("Start Pixel", start_pixel, "End Pixel", end_pixel)
-#                 print("Start Color", first_rgb_w, "End Color", second_rgb_w)
-                fraction = j / (end_pixel - start_pixel)
-                red = round((second_rgb_w[0] - first_rgb_w[0]) * fraction + first_rgb_w[0])
-                green = round((second_rgb_w[1] - first_rgb_w[1]) * fraction + first_rgb_w[1])
-                blue = round((second_rgb_w[2] - first_rgb_w[2]) * fraction + first_rgb_w[2])
-                # if it's (r, g, b, w)
-                if len(first_rgb_w) == 4 and 'W' in self.mode:
-                    white = round((second_rgb_w[3] - first_rgb_w[3]) * fraction + first_rgb_w[3])
-                    if not reverse: 
-                        self.set_pixel(start_pixel + j, (red, green, blue, white))
-                    else:
-                        self.set_pixel(end_pixel - j, (red, green, blue, white))
-                else:
-                    if not reverse:
-                        self.set_pixel(start_pixel + j, (red, green, blue))
-                    else:
-                        self.set_pixel(end_pixel - j, (red, green, blue))
-                if rainbow:
-#                     print("Rainbow")
-                    if (end_pixel+j) > (pixel2+2):
-                        break
-                else:
-#                     print("Gradient")
-                    start_pixel = end_pixel
-                    end_pixel = pixel2
-                    reverse = True
-#                     print("Start", start_pixel, "End", end_pixel)
+            # segment ranges and colors are fixed per segment, the pixels are interpolated in one pass.
+            # Segments leave out their end pixel, which is the next segment's start, except the last one
+            start_pixel = pixel1 + i * step
+            if i == divs - 1:
+                end_pixel = pixel2
+                count = end_pixel - start_pixel + 1
+            else:
+                end_pixel = min(start_pixel + step, pixel2)
+                count = end_pixel - start_pixel
+            next_color = color_list[(i + 1) % divs]
+#             print("Start Pixel", start_pixel, "End Pixel", end_pixel)
+#             print("Start Color", color, "End Color", next_color)
+            if end_pixel == start_pixel:
+                # nothing to interpolate, a one pixel last segment still gets its start color
+                if count:
+                    _fill_pixel(self.pixels, start_pixel, 1, self.pack(next_color if reverse else color))
+                continue
+            if not reverse:
+                self._line_gradient(start_pixel, end_pixel, color, next_color, count)
+            else:
+                self._line_gradient(start_pixel, end_pixel, next_color, color, count)
+
+    # Render a gradient over the whole strip once, so animations can copy it instead of interpolating
+    # every frame. Brightness is baked in, build it again after changing brightness.
+    def build_gradient_lut(self, color_list, reverse=True, rainbow=False):
+        """
+
+        :param color_list: List of colors (in rgb or rgbw tuples)
+        :param reverse: See segment_gradient
+        :param rainbow: See segment_gradient
+        :return: Buffer with the rendered pixels, for set_pixels_from_lut
+        """
+        pixels = self.pixels
+        lut = bytearray(len(pixels))
+        self.pixels = lut
+        try:
+            self.segment_gradient(color_list, 0, self.num_leds - 1, reverse, rainbow)
+        finally:
+            # put the real buffer back even if the gradient could not be rendered
+            self.pixels = pixels
+        return lut
+
+    # Copy a buffer from build_gradient_lut into the pixels, rotated left by <offset> pixels
+    def set_pixels_from_lut(self, lut, offset=0):
+        """
 
+        :param lut: Buffer returned by build_gradient_lut
+        :param offset: Number of pixels to rotate left by
+        :return: None
+        """
+        n = (offset % self.num_leds) * self._bpp
+        src = memoryview(lut)
+        size = len(lut)
+        self.pixels[:size - n] = src[n:]
+        self.pixels[size - n:] = src[:n]
 
     # Set an array of pixels starting from "pixel1" to "pixel2" (inclusive) to the desired color.
     # Function accepts (r, g, b) / (r, g, b, w) tuple
+    @micropython.native
     def set_pixel_line(self, pixel1, pixel2, rgb_w):
         """
 
@@ -202,8 +404,31 @@ class Neopixel:
         :param rgb_w:
         :return: None
         """
-        for i in range(pixel1, pixel2 + 1):
-            self.set_pixel(i, rgb_w)
+        pixel1 = self._pixel_index(pixel1)
+        pixel2 = self._pixel_index(pixel2)
+        # like range(), a line that ends before it starts sets nothing
+        if pixel1 > pixel2:
+            return
+        _fill_pixel(self.pixels, pixel1, pixel2 - pixel1 + 1, self.pack(rgb_w))
+
+    # Pack an (r, g, b) / (r, g, b, w) tuple into the bytes that are pushed to the state machine,
+    # with brightness already applied. Useful for precomputing a palette once.
+    def pack(self, rgb_w):
+        """
+
+        :param rgb_w:
+        :return: Packed pixel value
+        """
+        lut = self._lut
+        px = bytearray(self._bpp)
+        px[self._iR] = lut[rgb_w[0] & 0xff]
+        px[self._iG] = lut[rgb_w[1] & 0xff]
+        px[self._iB] = lut[rgb_w[2] & 0xff]
+        # if it's (r, g, b, w)
+        if self._has_w and len(rgb_w) == 4:
+            px[self._iW] = lut[rgb_w[3] & 0xff]
+
+        return bytes(px)
 
     # Set red, green and blue value of pixel on position <pixel_num>
     # Function accepts (r, g, b) / (r, g, b, w) tuple
@@ -214,17 +439,38 @@ class Neopixel:
         :param rgb_w:
         :return: None
         """
-        pos = self.shift
+        _pack_and_store(self.pixels, self._pixel_index(pixel_num), rgb_w, self._params)
 
-        red = round(rgb_w[0] * (self.brightness() / 255))
-        green = round(rgb_w[1] * (self.brightness() / 255))
-        blue = round(rgb_w[2] * (self.brightness() / 255))
-        white = 0
-        # if it's (r, g, b, w)
-        if len(rgb_w) == 4 and 'W' in self.mode:
-            white = round(rgb_w[3] * (self.brightness() / 255))
+    # Set consecutive pixels from <start> on, one per color in <colors>, in a single call.
+    # Function accepts an iterable of (r, g, b) / (r, g, b, w) tuples
+    def set_pixels(self, colors, start=0):
+        """
+
+        :param colors: Iterable of colors. Sequences running past the end of the strip raise IndexError
+            before anything is set; for iterables without len() the pixels set before the error are kept
+        :param start: Index of the first pixel to set. Default = 0
+        :return: None
+        """
+        if start < 0:
+            raise IndexError("pixel index out of range")
+        try:
+            count = len(colors)
+        except TypeError:
+            count = None    # e.g. a generator, _store_colors still stops at the end of the strip
+        if count is not None and start + count > self.num_leds:
+            raise IndexError("pixel index out of range")
+        _store_colors(self.pixels, start, colors, self._params)
+
+    # Set pixel on position <pixel_num> to a value already returned by pack()
+    def set_pixel_raw(self, pixel_num, px):
+        """
 
-        self.pixels[pixel_num] = white << pos['W'] | blue << pos['B'] | red << pos['R'] | green << pos['G']
+        :param pixel_num:
+        :param px: Packed pixel from pack()
+        :return: None
+        """
+        pos = self._pixel_index(pixel_num) * self._bpp
+        self.pixels[pos:pos + self._bpp] = px
 
     # Rotate <num_of_pixels> pixels to the left
     def rotate_left(self, num_of_pixels=1):
@@ -235,7 +481,18 @@ class Neopixel:
         """
         if num_of_pixels == None:
             num_of_pixels = 1
-        self.pixels = self.pixels[num_of_pixels:] + self.pixels[:num_of_pixels]
+        num_of_pixels %= self.num_leds
+        if num_of_pixels == 0:
+            return
+        if num_of_pixels == 1:
+            _rotate_left_one(self.pixels, len(self.pixels), self._bpp)
+            return
+        # Rotate in place so the buffer itself is kept, only the wrapped part is copied out
+        buf = self.pixels
+        n = num_of_pixels * self._bpp
+        head = buf[:n]
+        buf[:-n] = buf[n:]
+        buf[-n:] = head
 
     # Rotate <num_of_pixels> pixels to the right
     def rotate_right(self, num_of_pixels):
@@ -246,34 +503,85 @@ class Neopixel:
         """
         if num_of_pixels == None:
             num_of_pixels = 1
-        num_of_pixels = -1 * num_of_pixels
-        self.pixels = self.pixels[num_of_pixels:] + self.pixels[:num_of_pixels]
+        num_of_pixels %= self.num_leds
+        if num_of_pixels == 0:
+            return
+        if num_of_pixels == 1:
+            _rotate_right_one(self.pixels, len(self.pixels), self._bpp)
+            return
+        # Rotate in place so the buffer itself is kept, only the wrapped part is copied out
+        buf = self.pixels
+        n = num_of_pixels * self._bpp
+        tail = buf[-n:]
+        buf[n:] = buf[:-n]
+        buf[:n] = tail
 
     # Update pixels
+    @micropython.native
     def show(self):
         """
 
         :return: None
         """
-        # If mode is RGB, we cut 8 bits of, otherwise we keep all 32
-        cut = 8
-        if 'W' in self.mode:
-            cut = 0
-        for i in range(self.num_leds):
-            self.sm.put(self.pixels[i], cut)
-        time.sleep(self.delay)
+        self.show_async()
+        self.wait_show()
+
+    # Push pixels to the state machine without waiting for the reset time. The state machine
+    # keeps clocking the data out, so the next frame can be prepared while the strip updates
+    def show_async(self):
+        """
+
+        :return: None
+        """
+        # The old front buffer becomes the new back buffer, so it must be fully sent first,
+        # and the strip needs the reset gap before new data or it never latches the last frame
+        self._wait_sent()
+        self._wait_latch()
+        self._front, self.pixels = self.pixels, self._front
+        # Carry the frame over so callers can keep drawing on top of it
+        self.pixels[:] = self._front
+        # Each byte takes 10us on the wire at 800kHz, then the strip needs delay to latch
+        self._latch_at = time.ticks_add(time.ticks_us(), len(self._front) * 10 + int(self.delay * 1000000))
+        if self._dma:
+            self._dma.config(read=self._front, write=self._txf, count=len(self._front),
+                             ctrl=self._dma_ctrl, trigger=True)
+        else:
+            # put() takes the whole buffer, one byte per FIFO word shifted up to the top bits that go out first
+            self.sm.put(self._front, 24)
+
+    # Wait until the last frame has been sent out and the strip has latched it
+    def wait_show(self):
+        """
+
+        :return: None
+        """
+        self._wait_sent()
+        self._wait_latch()
+
+    # Wait until the last frame has gone out on the wire and the reset gap after it has passed
+    def _wait_latch(self):
+        if self._latch_at is not None:
+            while time.ticks_diff(self._latch_at, time.ticks_us()) > 0:
+                pass
+
+    # Wait until the DMA channel and the state machine FIFO have handed over every byte
+    def _wait_sent(self):
+        if self._dma:
+            while self._dma.active():
+                pass
+        while self.sm.tx_fifo():
+            pass
 
     # Set all pixels to given rgb values
     # Function accepts (r, g, b) / (r, g, b, w)
+    @micropython.native
     def fill(self, rgb_w):
         """
 
         :param rgb_w:
         :return: None
         """
-        for i in range(self.num_leds):
-            self.set_pixel(i, rgb_w)
-        time.sleep(self.delay)
+        _fill_pixel(self.pixels, 0, self.num_leds, self.pack(rgb_w))
         
 if __name__ == "__main__":
     # Define neopixel parameters 